@@ -1,6 +1,26 @@
 """Minimal Project Task Forecasting."""
-
-from monaco.task import *
-from monaco.project import *
+import importlib
 
 __version__ = '0.1.2'
+
+# public classes and the module that defines them, imported on first access
+# so that e.g. the command line interface does not have to load numpy
+_LAZY = {
+    'Task': 'monaco.task',
+    'Project': 'monaco.project',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        obj = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = obj
+        return obj
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+        __name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,108 @@
+"""Compiled kernels for the Monte Carlo simulation of projects"""
+import functools
+import importlib.util
+import numpy as np
+
+# numba is slow to import, only look it up here and import it on first use
+HAS_NUMBA = importlib.util.find_spec('numba') is not None
+
+# replaced by numba.prange before the first kernel is compiled
+prange = range
+
+
+def num_threads():
+    """ Number of threads numba runs parallel kernels on. """
+    import numba
+    return numba.get_num_threads()
+
+
+def _lazy_njit(**options):
+    """ Compile a kernel with numba.njit the first time it is called. """
+    def decorator(func):
+        compiled = None
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            nonlocal compiled
+            if compiled is None:
+                import numba
+                globals()['prange'] = numba.prange
+                compiled = numba.njit(**options)(func)
+            return compiled(*args)
+
+        return wrapper
+
+    return decorator
+
+
+@_lazy_njit(parallel=True, cache=True, fastmath=True)
+def simulate_schedule(u, mins, maxs, width, split, lo_span, hi_span, codes,
+                      order, deps_flat, deps_off, n_threads, sims):
+    """ Simulate the finish time of a project per simulation run.
+
+    Samples are drawn through the inverse CDF of each task's distribution,
+    so the random numbers come from the caller's numpy Generator and runs
+    stay reproducible. Tasks are then visited in topological order and
+    finish after their own duration on top of their latest dependency.
+
+    Parameters
+    ----------
+    u : numpy.ndarray
+        Uniform random numbers in [0, 1) of shape (n, tasks)
+    mins : numpy.ndarray
+        Minimum estimate of every task
+    maxs : numpy.ndarray
+        Maximum estimate of every task
+    width : numpy.ndarray
+        Difference between maximum and minimum of every task
+    split : numpy.ndarray
+        Share of the triangular distribution below the mode of every task
+    lo_span : numpy.ndarray
+        Width times the distance from minimum to mode of every task
+    hi_span : numpy.ndarray
+        Width times the distance from mode to maximum of every task
+    codes : numpy.ndarray
+        Estimator code of every task, 0 for triangular and 1 for uniform
+    order : numpy.ndarray
+        Task indices in topological order
+    deps_flat : numpy.ndarray
+        Concatenated dependency indices of all tasks
+    deps_off : numpy.ndarray
+        Offsets of every task's dependencies in deps_flat, with the
+        dependencies of task j at deps_flat[deps_off[j]:deps_off[j + 1]]
+    n_threads : int
+        Number of contiguous slabs of runs to spread over the threads
+    sims : numpy.ndarray
+        Array of shape (n,) the durations are written to, its previous
+        content is overwritten
+
+    Returns
+    -------
+    sims : numpy.ndarray
+        The sims array, holding the estimated project duration per run
+    """
+    n, k = u.shape
+
+    # one contiguous slab of runs per thread rather than prange's default
+    # scheduling, the work per run is too small to balance dynamically
+    chunk = (n + n_threads - 1) // n_threads
+    for tid in prange(n_threads):
+        finish = np.empty(k, dtype=u.dtype)
+        for i in range(tid * chunk, min((tid + 1) * chunk, n)):
+            total = 0.0
+            for j in order:
+                uij = u[i, j]
+                if codes[j] == 1:
+                    s = mins[j] + uij * width[j]
+                elif uij < split[j]:
+                    s = mins[j] + np.sqrt(uij * lo_span[j])
+                else:
+                    s = maxs[j] - np.sqrt((1 - uij) * hi_span[j])
+
+                start = 0.0
+                for d in deps_flat[deps_off[j]:deps_off[j + 1]]:
+                    start = max(start, finish[d])
+                finish[j] = start + s
+                total = max(total, finish[j])
+            sims[i] = total
+    return sims
@@ -1,25 +1,50 @@
-import math
-from collections import Counter
-import matplotlib.pyplot as plt
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from graphlib import TopologicalSorter
 import numpy as np
-import seaborn as sns
 from monaco import Task
+from monaco import _kernels
+from monaco.task import _ESTIMATORS, _new_rng
+
+# whether the seaborn plot style has been applied, see Project.plot()
+_SNS_SET = False
 
 
 class Project(Task):
 
-    def __init__(self, name=None):
+    def __init__(self, name=None, dtype=np.float32, seed=None):
         """ Project class
 
         Parameters
         ----------
         name : str, optional
             Name of the project
+        dtype : numpy.dtype, optional
+            Precision of the simulated durations. Single precision halves
+            the memory traffic of large simulations, pass np.float64 for
+            full precision.
+        seed : int, optional
+            Seed of the random number generator used by simulations, to
+            make them reproducible
 
         """
         super().__init__()
         self.name = name
         self.tasks = []
+        self.dtype = dtype
+        self.rng = _new_rng(seed)
+
+        # task parameters as contiguous arrays (structure of arrays) for the
+        # vectorized samplers, with the estimates they were built from
+        self._params = None
+        self._arrays = None
+        self._sampler_arrays = None
+        self._has_subprojects = False
+
+        # dependencies and topological order of the tasks, built on demand
+        self._deps = None
+        self._topo = None
+        self._schedule = None
 
     def add_task(self, task):
         """ Add a task to the project.
@@ -29,18 +54,166 @@ class Project(Task):
         task : Task Object
             A subtask instantiated with monaco.Task()
         """
-        self.tasks.append(task)
+        self.add_tasks([task])
+
+    def add_tasks(self, tasks):
+        """ Add several tasks to the project at once.
+
+        The cached task schedule is reset once for the whole batch instead
+        of once per task.
+
+        Parameters
+        ----------
+        tasks : list of Task Objects
+            Subtasks instantiated with monaco.Task(), in the order they
+            would be added with add_task()
+        """
+        for task in tasks:
+            self.tasks.append(task)
+            self._has_subprojects |= isinstance(task, Project)
+
+        self._deps = None
+        self._topo = None
+        self._schedule = None
+
+    def _task_arrays(self):
+        """ Task parameters as contiguous arrays, built on demand.
+
+        The arrays are rebuilt whenever a task was added or one of its
+        estimates changed since the last call, so batch estimates always
+        follow the same tasks as estimate().
+
+        Returns
+        -------
+        arrays : tuple of numpy.ndarray
+            Minimum, mode, maximum and estimator code of every task
+        """
+        params = [(t.min, t.mode, t.max, t.estimator) for t in self.tasks]
+        if params != self._params:
+            mins, modes, maxs, codes = [], [], [], []
+            for lo, mode, hi, estimator in params:
+                if mode is None and lo is not None and hi is not None:
+                    # random.triangular falls back to the midpoint
+                    mode = (lo + hi) / 2
+                mins.append(lo)
+                modes.append(mode)
+                maxs.append(hi)
+                codes.append(_ESTIMATORS.index(estimator))
+            self._arrays = (np.array(mins, dtype=self.dtype),
+                            np.array(modes, dtype=self.dtype),
+                            np.array(maxs, dtype=self.dtype),
+                            np.array(codes, dtype=np.int8))
+            self._params = params
+            self._sampler_arrays = None
+        return self._arrays
+
+    def _inverse_cdf_arrays(self):
+        """ Per-task constants of the inverse CDF samplers, built on demand.
+
+        Precomputing these keeps divisions out of the per-sample loop: a
+        triangular sample is lo + sqrt(u * lo_span) when u < split and
+        hi - sqrt((1 - u) * hi_span) otherwise, a uniform sample is
+        lo + u * width.
+
+        Returns
+        -------
+        arrays : tuple of numpy.ndarray
+            Minimum, maximum, width, split, lo_span, hi_span and estimator
+            code of every task
+        """
+        mins, modes, maxs, codes = self._task_arrays()
+        if self._sampler_arrays is None:
+            # like random.triangular, accept swapped minimum and maximum
+            mins, maxs = np.minimum(mins, maxs), np.maximum(mins, maxs)
+            width = maxs - mins
+            with np.errstate(divide='ignore', invalid='ignore'):
+                # fixed durations always take the lower branch, which
+                # collapses to the minimum
+                split = np.where(width > 0, (modes - mins) / width, 1.)
+            self._sampler_arrays = (mins, maxs, width, split.astype(self.dtype),
+                                    width * (modes - mins),
+                                    width * (maxs - modes), codes)
+        return self._sampler_arrays
+
+    def _topological_order(self):
+        """ Order the tasks such that every task follows its dependencies.
+
+        Returns
+        -------
+        topo : list of int
+            Task indices in topological order
+        """
+        if self._topo is None:
+            idx = {t: i for i, t in enumerate(self.tasks)}
+            deps = []
+            # tasks added so far that no other task waits for yet
+            sinks = set()
+            for i, t in enumerate(self.tasks):
+                if t.depends_on is None:
+                    deps.append(sorted(sinks))
+                elif any(d not in idx for d in t.depends_on):
+                    raise Exception('task depends on a task outside '
+                                    'the project')
+                else:
+                    deps.append([idx[d] for d in t.depends_on])
+                sinks.difference_update(deps[i])
+                sinks.add(i)
+            self._deps = deps
+            self._topo = list(TopologicalSorter(
+                dict(enumerate(deps))).static_order())
+        return self._topo
+
+    def _compiled_schedule(self):
+        """ Topological order and dependencies as flat integer arrays.
+
+        Returns
+        -------
+        order : numpy.ndarray
+            Task indices in topological order
+        deps_flat : numpy.ndarray
+            Concatenated dependency indices of all tasks
+        deps_off : numpy.ndarray
+            Offsets of every task's dependencies in deps_flat
+        """
+        if self._schedule is None:
+            order = self._topological_order()
+            lengths = [len(d) for d in self._deps]
+            deps_off = np.zeros(len(self._deps) + 1, dtype=np.int32)
+            np.cumsum(lengths, out=deps_off[1:])
+            deps_flat = np.array([d for deps in self._deps for d in deps],
+                                 dtype=np.int32)
+            self._schedule = (np.array(order, dtype=np.int32), deps_flat,
+                              deps_off)
+        return self._schedule
 
     def estimate(self):
         """ Estimate the duration of a project given uncertainty estimates.
 
+        The duration of a project is the finish time of its last task,
+        where every task starts as soon as all of its dependencies are done.
+
         Returns
         -------
         p_est : float
             An estimated duration in measured in units
         """
-        self.p_est = sum([t.estimate() for t in self.tasks])
-        return self.p_est
+        # bind lookups to locals once, this runs once per simulated sample
+        topo = self._topological_order()
+        tasks = self.tasks
+        all_deps = self._deps
+        finish = [0.] * len(tasks)
+        p_est = 0
+        for j in topo:
+            start = 0.
+            for d in all_deps[j]:
+                if finish[d] > start:
+                    start = finish[d]
+            end = start + tasks[j].estimate()
+            finish[j] = end
+            if end > p_est:
+                p_est = end
+        self.p_est = p_est
+        return p_est
 
     def _simulate(self, n=1000):
         """ Run a monte carlo simulation by simulating n estimation runs.
@@ -52,14 +225,234 @@ class Project(Task):
 
         Returns
         -------
-        c : Counter() object
-            Counter with count of estimation occurences
+        offset : int
+            Whole number of units of the first bin
+        counts : numpy.ndarray
+            Number of estimations per whole number of units, starting at
+            offset
+        """
+        return self._histogram(self._simulate_vectorized(n))
+
+    @staticmethod
+    def _histogram(sims):
+        """ Count estimations per whole number of units.
+
+        Parameters
+        ----------
+        sims : numpy.ndarray
+            Estimated project durations
+
+        Returns
+        -------
+        offset : int
+            Whole number of units of the first bin
+        counts : numpy.ndarray
+            Number of estimations per whole number of units, starting at
+            offset
         """
-        sims = [self.estimate() for i in range(n)]
-        c = Counter(sims)
-        return c
+        # casting truncates, which equals flooring for the usual
+        # non-negative durations and saves a float temporary
+        ints = sims.astype(np.int32)
+        if ints.size and sims.min() < 0:
+            ints = np.floor(sims).astype(np.int32)
+        offset = int(ints.min()) if ints.size else 0
+        return offset, np.bincount(ints - offset)
+
+    def estimate_batch(self, n, rng=None, out=None, qmc=False):
+        """ Estimate the duration of a project n times in a single batch.
+
+        Parameters
+        ----------
+        n : int
+            Number of estimates to draw
+        rng : numpy.random.Generator, optional
+            Random number generator shared by all tasks of the project,
+            defaults to the project's own generator
+        out : numpy.ndarray, optional
+            Array of shape (n,) to write the estimates to, reuse one
+            buffer when running many batches to avoid an allocation per
+            batch
+        qmc : bool, optional
+            Draw the tasks from a scrambled Sobol sequence instead of
+            independent random numbers. Quasi-Monte Carlo estimates
+            converge faster, pass a power of 2 as n to keep the sequence
+            balanced. Requires scipy and is not supported for projects
+            containing subprojects.
+
+        Returns
+        -------
+        est : numpy.ndarray
+            Array of n estimated project durations, out if it was given
+        """
+        if rng is None:
+            rng = self.rng
+        if out is None:
+            out = np.empty(n, dtype=self.dtype)
+        elif out.shape != (n,):
+            raise Exception('out must have shape (n,)')
+
+        k = len(self.tasks)
+        if not k:
+            out[:] = 0
+            return out
+
+        if qmc:
+            if self._has_subprojects:
+                raise Exception('quasi-Monte Carlo sampling is not '
+                                'supported for projects with subprojects')
+            # scipy is slow to import and optional, only load it when needed
+            from scipy.stats import qmc as scipy_qmc
+            sobol = scipy_qmc.Sobol(k, scramble=True, seed=rng)
+            u = sobol.random(n).astype(self.dtype)
+        elif not self._has_subprojects:
+            u = rng.random((n, k), dtype=self.dtype)
+
+        if _kernels.HAS_NUMBA and not self._has_subprojects:
+            return _kernels.simulate_schedule(u, *self._inverse_cdf_arrays(),
+                                              *self._compiled_schedule(),
+                                              _kernels.num_threads(), out)
 
-    def plot(self, n=1000, hist=True, kde=False):
+        if self._has_subprojects:
+            samples = np.empty((n, k), dtype=self.dtype)
+            for j, t in enumerate(self.tasks):
+                samples[:, j] = t.estimate_batch(n, rng)
+        else:
+            # same inverse CDF as the numba kernel, evaluating both branches
+            # and selecting per sample instead of branching
+            mins, maxs, width, split, lo_span, hi_span, codes = \
+                self._inverse_cdf_arrays()
+            lower = mins + np.sqrt(u * lo_span)
+            upper = maxs - np.sqrt((1 - u) * hi_span)
+            samples = np.where(u < split, lower, upper)
+            samples = np.where(codes == 1, mins + u * width, samples)
+
+        # walk the tasks in topological order, every task finishes after
+        # its own duration on top of the latest finish of its dependencies
+        topo = self._topological_order()
+        finish = samples
+        for j in topo:
+            deps = self._deps[j]
+            if len(deps) == 1:
+                finish[:, j] += finish[:, deps[0]]
+            elif deps:
+                finish[:, j] += finish[:, deps].max(axis=1)
+        return finish.max(axis=1, out=out)
+
+    def _simulate_vectorized(self, n=1000):
+        """ Run n estimation runs at once by sampling every task in batch.
+
+        Parameters
+        ----------
+        n : int
+            Number of estimations to run in the simulation
+
+        Returns
+        -------
+        sims : numpy.ndarray
+            Array of shape (n,) with the estimated project duration per run
+        """
+        return self.estimate_batch(n)
+
+    def statistics(self, n=10000):
+        """ Summarize the simulated project duration.
+
+        Parameters
+        ----------
+        n : int
+            Number of estimations to run in the simulation
+
+        Returns
+        -------
+        stats : dict
+            Mean, median, standard deviation and the 10th, 25th, 75th,
+            90th, 95th and 99th percentile of the project duration
+        """
+        sims = np.ascontiguousarray(self._simulate_vectorized(n))
+        # one call shares a single partition of the array between quantiles
+        p10, p25, p50, p75, p90, p95, p99 = np.percentile(
+            sims, [10, 25, 50, 75, 90, 95, 99], method='linear')
+        return {'mean': float(sims.mean(dtype=np.float64)),
+                'median': float(p50),
+                'std': float(sims.std(dtype=np.float64)),
+                'p10': float(p10),
+                'p25': float(p25),
+                'p75': float(p75),
+                'p90': float(p90),
+                'p95': float(p95),
+                'p99': float(p99)}
+
+    @staticmethod
+    def simulate_many(projects, n=1000, max_workers=None, chunk_size=10000,
+                      seed=None):
+        """ Simulate several project scenarios in parallel processes.
+
+        Every scenario is split into chunks of at most chunk_size runs, so
+        workers that finish a small scenario early pick up the remaining
+        chunks of the larger ones.
+
+        Workers are started with the spawn method, which re-imports the
+        caller's main module. Scripts calling this with more than one
+        worker must guard their entry point with
+        ``if __name__ == '__main__':``, otherwise every worker raises a
+        RuntimeError while starting.
+
+        Parameters
+        ----------
+        projects : list of Project
+            Scenarios to simulate
+        n : int
+            Number of estimations to run per scenario
+        max_workers : int, optional
+            Number of worker processes, runs in the current process if 1
+        chunk_size : int
+            Maximum number of estimations handed to a worker at once
+        seed : int, optional
+            Seed to make the simulations reproducible
+
+        Returns
+        -------
+        sims : list of numpy.ndarray
+            Array of shape (n,) with the estimated durations per scenario
+        """
+        sizes = [min(chunk_size, n - i) for i in range(0, n, chunk_size)]
+        jobs = [(p, size) for p in projects for size in sizes]
+        seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+        args = ([p for p, _ in jobs], [size for _, size in jobs], seeds)
+
+        if max_workers == 1:
+            chunks = list(map(_simulate_chunk, *args))
+        else:
+            # forking after numba started its thread pool can deadlock
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=max_workers,
+                                     mp_context=context) as executor:
+                chunks = list(executor.map(_simulate_chunk, *args))
+
+        sims = []
+        for i in range(len(projects)):
+            part = chunks[i * len(sizes):(i + 1) * len(sizes)]
+            sims.append(np.concatenate(part) if part else np.empty(0))
+        return sims
+
+    def compute_histogram(self, n=1000):
+        """ Simulate the project and count estimations per whole unit.
+
+        Parameters
+        ----------
+        n : int
+            Number of estimations to run in the simulation
+
+        Returns
+        -------
+        values : numpy.ndarray
+            Whole number of units of every bin
+        weights : numpy.ndarray
+            Number of estimations that fall into every bin
+        """
+        offset, counts = self._simulate(n)
+        return np.arange(len(counts)) + offset, counts
+
+    def plot(self, n=1000, hist=True, kde=False, show=True, ax=None):
         """ Plot the resulting histogram
 
         Parameters
@@ -70,35 +463,53 @@ class Project(Task):
             Whether to plot a histogram or cumulative distribution plot
         kde : bool
             Whether to plot the kernel density estimation on the histogram
+        show : bool
+            Whether to show the plot right away
+        ax : matplotlib.axes.Axes, optional
+            Axes to draw on, a new figure is created by default
 
         Returns
         -------
-        plot : matplotlib.plt() object
+        plot : matplotlib.axes.Axes object
             Plot object
 
         """
-        sns.set(rc={"xtick.bottom": True, "ytick.left": True})
-        sims = [self.estimate() for i in range(n)]
-        fig, ax = plt.subplots(figsize=(10, 8))
+        # plotting libraries are slow to import, only load them when needed
+        global _SNS_SET
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        if not _SNS_SET:
+            sns.set(rc={"xtick.bottom": True, "ytick.left": True})
+            _SNS_SET = True
+
+        sims = self._simulate_vectorized(n)
+        offset, counts = self._histogram(sims)
+        units = np.arange(len(counts)) + offset
+        if ax is None:
+            fig, ax = plt.subplots(figsize=(10, 8))
 
         if hist:
-            kwargs = {'cumulative': False, 'edgecolor': "k", 'linewidth': 1}
-            plot = sns.distplot(sims, bins=math.floor(max(sims)), hist=True,
-                                kde=kde,norm_hist=False, hist_kws=kwargs,
-                                ax=ax)
-            plt.title('Histogram - days to project completion '
-                      '- n = {}'.format(n))
-            plt.axvline(x=np.median(sims), color='red', label='50%')
-            plt.text(np.median(sims)-0.5, -2, '50%', color='red')
-            plt.show()
+            ax.bar(units, counts, width=1, align='edge', edgecolor="k",
+                   linewidth=1)
+            if kde:
+                sns.kdeplot(sims, ax=ax.twinx(), color='k')
+            ax.set_title('Histogram - days to project completion '
+                         '- n = {}'.format(n))
+            ax.axvline(x=np.median(sims), color='red', label='50%')
+            ax.text(np.median(sims)-0.5, -2, '50%', color='red')
 
         else:
-            kwargs = {'cumulative': True, 'edgecolor': "k", 'linewidth': 1}
-            plot = sns.distplot(sims, bins=math.floor(max(sims)),
-                                hist=True, kde=False, norm_hist=True,
-                                hist_kws=kwargs)
-            plt.title('Cumulative histogram - days project to completion '
-                      '- n = {}'.format(n))
+            ax.bar(units, np.cumsum(counts) / n, width=1, align='edge',
+                   edgecolor="k", linewidth=1)
+            ax.set_title('Cumulative histogram - days project to completion '
+                         '- n = {}'.format(n))
+
+        if show:
             plt.show()
 
-        return plot
+        return ax
+
+
+def _simulate_chunk(project, n, seed):
+    """ Simulate a chunk of estimations in a worker process. """
+    return project.estimate_batch(n, _new_rng(seed))
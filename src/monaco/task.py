@@ -1,12 +1,31 @@
 """Logic for creating Tasks"""
 from datetime import datetime
+import math
 import random
+import numpy as np
+
+# position in this list is the estimator code used by vectorized samplers
+_ESTIMATORS = ['triangular', 'uniform']
+
+
+def _new_rng(seed=None):
+    """ Create the numpy generator used by batch simulations.
+
+    SFC64 is a little faster than numpy's default PCG64 per draw. Scalar
+    estimates keep using the random module, which has far less call
+    overhead for a single draw.
+    """
+    return np.random.Generator(np.random.SFC64(seed))
 
 
 class Task:
 
+    __slots__ = ('cdate', 'name', '_mode', '_min', '_max', '_estimator',
+                 'depends_on', '_sampler', '_lo', '_hi', '_split', '_lo_span',
+                 '_hi_span')
+
     def __init__(self, name=None, min=None, mode=None,
-                 max=None, estimator='triangular'):
+                 max=None, estimator='triangular', depends_on=None):
         """ Task class.
 
         Parameters
@@ -21,26 +40,175 @@ class Task:
             The maximum estimated number of units to complete a task
         estimator : str
             An estimator in form of a probability distribution
+        depends_on : list of Task, optional
+            Tasks that have to be completed before this task can start. By
+            default a task starts once every task added to the project
+            before it is done, pass an empty list to start it right away.
+
+        """
+        self._setup(name, min, mode, max, estimator, depends_on,
+                    datetime.now())
+
+    @classmethod
+    def _from_arrays(cls, mins, modes, maxs, estimator='triangular'):
+        """Create one task per set of estimates in bulk.
+
+        Looks up the current time once for all tasks instead of once per
+        task, which adds up when building thousands of synthetic tasks.
+
+        Parameters
+        ----------
+        mins : array_like
+            The minimum estimate of every task
+        modes : array_like
+            The most likely estimate of every task
+        maxs : array_like
+            The maximum estimate of every task
+        estimator : str
+            An estimator in form of a probability distribution
 
+        Returns
+        -------
+        tasks : list of Task
+            One task per estimate, all with the same creation date
         """
-        self.cdate = datetime.now()
+        cdate = datetime.now()
+        tasks = []
+        for lo, mode, hi in zip(np.asarray(mins).tolist(),
+                                np.asarray(modes).tolist(),
+                                np.asarray(maxs).tolist()):
+            task = cls.__new__(cls)
+            task._setup(None, lo, mode, hi, estimator, None, cdate)
+            tasks.append(task)
+        return tasks
+
+    def _setup(self, name, min, mode, max, estimator, depends_on, cdate):
+        self.cdate = cdate
         self.name = name
-        self.mode = mode
-        self.min = min
-        self.max = max
+        self._mode = mode
+        self._min = min
+        self._max = max
+        # copy so that later changes to the caller's list do not silently
+        # change the dependency graph cached by a project
+        self.depends_on = None if depends_on is None else list(depends_on)
         self.estimator = estimator
 
-        if self.estimator not in ['triangular', 'uniform']:
+    @property
+    def min(self):
+        """The minimum estimated number of units to complete a task"""
+        return self._min
+
+    @min.setter
+    def min(self, min):
+        self._min = min
+        self._bind_sampler()
+
+    @property
+    def mode(self):
+        """The most likely estimated number of units to complete a task"""
+        return self._mode
+
+    @mode.setter
+    def mode(self, mode):
+        self._mode = mode
+        self._bind_sampler()
+
+    @property
+    def max(self):
+        """The maximum estimated number of units to complete a task"""
+        return self._max
+
+    @max.setter
+    def max(self, max):
+        self._max = max
+        self._bind_sampler()
+
+    @property
+    def estimator(self):
+        """An estimator in form of a probability distribution"""
+        return self._estimator
+
+    @estimator.setter
+    def estimator(self, estimator):
+        if estimator not in _ESTIMATORS:
             raise Exception('not a valid estimator')
+        self._estimator = estimator
+        self._bind_sampler()
+
+    def _bind_sampler(self):
+        # resolve the estimator once instead of on every estimate, again
+        # whenever one of the estimates or the estimator changes
+        if self._estimator == 'triangular':
+            if self._min is None or self._max is None:
+                self._sampler = self._estimate_random_triangular
+            else:
+                self._setup_triangular()
+                self._sampler = self._estimate_triangular
+        elif self._estimator == 'uniform':
+            self._sampler = self._estimate_uniform
+
+    def _setup_triangular(self):
+        # like random.triangular, swapped minimum and maximum describe the
+        # same distribution
+        lo, hi = sorted((self._min, self._max))
+        # constants of the inverse CDF, so sampling needs no division
+        mode = (lo + hi) / 2 if self._mode is None else self._mode
+        width = hi - lo
+        self._lo = lo
+        self._hi = hi
+        self._split = (mode - lo) / width if width else 1.
+        self._lo_span = width * (mode - lo)
+        self._hi_span = width * (hi - mode)
 
     def estimate(self):
         """Estimate duration of a task following a probability
         distribution."""
-        if self.estimator == 'triangular':
-            est = random.triangular(low=self.min, mode=self.mode,
-                                    high=self.max)
+        return self._sampler()
+
+    def _estimate_triangular(self):
+        u = random.random()
+        if u < self._split:
+            return self._lo + math.sqrt(u * self._lo_span)
+        return self._hi - math.sqrt((1. - u) * self._hi_span)
+
+    def _estimate_random_triangular(self):
+        return random.triangular(low=self._min, mode=self._mode,
+                                 high=self._max)
+
+    def _estimate_uniform(self):
+        return random.uniform(self._min, self._max)
+
+    def estimate_batch(self, n, rng=None):
+        """Estimate duration of a task n times in a single batch.
+
+        Parameters
+        ----------
+        n : int
+            Number of estimates to draw
+        rng : numpy.random.Generator, optional
+            Random number generator to draw from. Share a single generator
+            across the tasks of a simulation to avoid seeding one per task.
+
+        Returns
+        -------
+        est : numpy.ndarray
+            Array of n estimated durations
+        """
+        if rng is None:
+            rng = _new_rng()
+
+        if self.min == self.max:
+            # numpy rejects an empty range, the duration is fixed anyway
+            est = np.full(n, float(self.min))
+
+        elif self.estimator == 'triangular':
+            # numpy rejects swapped bounds, random.triangular accepts them
+            lo, hi = sorted((self.min, self.max))
+            # random.triangular falls back to the midpoint without a mode
+            mode = (lo + hi) / 2 if self.mode is None else self.mode
+            est = rng.triangular(lo, mode, hi, size=n)
 
         elif self.estimator == 'uniform':
-            est = random.uniform(self.min, self.max)
+            est = rng.uniform(self.min, self.max, size=n)
 
         return est
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from monaco import _kernels
+
+pytest.importorskip('numba')
+
+
+def _simulate(u, mins, modes, maxs, codes, deps):
+    order = np.arange(len(deps), dtype=np.int32)
+    deps_off = np.cumsum([0] + [len(d) for d in deps]).astype(np.int32)
+    deps_flat = np.array([d for ds in deps for d in ds], dtype=np.int32)
+    width = maxs - mins
+    split = np.where(width > 0, (modes - mins) / np.where(width, width, 1), 1)
+    return _kernels.simulate_schedule(u, mins, maxs, width, split,
+                                      width * (modes - mins),
+                                      width * (maxs - modes), codes, order,
+                                      deps_flat, deps_off, 2,
+                                      np.empty(len(u)))
+
+
+def test_simulate_schedule_bounds():
+    mins = np.array([2., 30.])
+    modes = np.array([3., 35.])
+    maxs = np.array([7., 40.])
+    codes = np.array([0, 1], dtype=np.int8)
+    u = np.array([[0., 0.], [0.999999, 0.5]])
+    sims = _simulate(u, mins, modes, maxs, codes, [[], [0]])
+    assert sims.shape == (2,)
+    assert sims[0] == pytest.approx(32.)
+    assert sims[1] == pytest.approx(42., abs=1e-2)
+
+
+def test_simulate_schedule_parallel_tasks():
+    mins = np.array([2., 30.])
+    modes = np.array([3., 35.])
+    maxs = np.array([7., 40.])
+    codes = np.array([0, 1], dtype=np.int8)
+    u = np.array([[0., 0.]])
+    # without dependencies the tasks run in parallel
+    sims = _simulate(u, mins, modes, maxs, codes, [[], []])
+    assert sims[0] == pytest.approx(30.)
+
+
+def test_simulate_schedule_mode():
+    mins = np.array([0.])
+    modes = np.array([4.])
+    maxs = np.array([10.])
+    codes = np.array([0], dtype=np.int8)
+    # the inverse CDF maps u == (mode - min) / (max - min) onto the mode
+    sims = _simulate(np.array([[0.4]]), mins, modes, maxs, codes, [[]])
+    assert sims[0] == pytest.approx(4.)
+
+
+def test_simulate_schedule_fixed_duration():
+    mins = np.array([3., 2.])
+    codes = np.array([0, 1], dtype=np.int8)
+    sims = _simulate(np.array([[0.7, 0.7]]), mins, mins, mins, codes,
+                     [[], [0]])
+    assert sims[0] == pytest.approx(5.)
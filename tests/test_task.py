@@ -52,3 +52,80 @@ def test_task_estimate():
     assert type(t1.estimate()) == float
     t2 = Task(min=1, mode=2, max=3, estimator='triangular')
     assert type(t2.estimate()) == float
+
+
+def test_task_estimate_batch():
+    t1 = Task(min=1, mode=2, max=3, estimator='triangular')
+    est = t1.estimate_batch(100)
+    assert est.shape == (100,)
+    assert ((est >= 1) & (est <= 3)).all()
+    t2 = Task(min=4, max=5, estimator='uniform')
+    est = t2.estimate_batch(100)
+    assert ((est >= 4) & (est <= 5)).all()
+
+
+def test_task_estimate_batch_fixed_duration():
+    t1 = Task(min=3, mode=3, max=3)
+    assert list(t1.estimate_batch(5)) == [3.] * 5
+    t2 = Task(min=3, max=3, estimator='uniform')
+    assert list(t2.estimate_batch(5)) == [3.] * 5
+
+
+def test_task_depends_on_copy():
+    t1 = Task(min=1, max=2)
+    deps = [t1]
+    t2 = Task(min=1, max=2, depends_on=deps)
+    deps.append(Task(min=1, max=2))
+    assert t2.depends_on == [t1]
+    assert Task().depends_on is None
+
+
+def test_task_from_arrays():
+    tasks = Task._from_arrays([1, 2], [2, 3], [3, 4])
+    assert len(tasks) == 2
+    assert tasks[1].min == 2
+    assert tasks[0].cdate == tasks[1].cdate
+    assert 1 <= tasks[0].estimate() <= 3
+    assert not hasattr(tasks[0], '__dict__')
+
+
+def test_task_estimate_triangular_bounds():
+    t1 = Task(min=2, mode=3, max=7)
+    ests = [t1.estimate() for _ in range(1000)]
+    assert all(2 <= e <= 7 for e in ests)
+    assert type(ests[0]) == float
+    assert Task(min=4, mode=4, max=4).estimate() == 4
+    assert 1 <= Task(min=1, max=3).estimate() <= 3
+
+
+def test_task_change_estimator():
+    t = Task(min=2, mode=3, max=100)
+    t.estimator = 'uniform'
+    assert t.estimator == 'uniform'
+    assert t._sampler == t._estimate_uniform
+    with pytest.raises(Exception):
+        t.estimator = 'normal'
+    assert t.estimator == 'uniform'
+
+
+def test_task_change_bounds():
+    t = Task(min=1, mode=2, max=3)
+    t.max = 100
+    t.mode = 50
+    t.min = 10
+    est = [t.estimate() for _ in range(1000)]
+    assert 10 <= min(est)
+    assert max(est) <= 100
+    # both sides of the mode are sampled, not only the old bounds
+    assert sum(e < 50 for e in est) > 300
+    assert sum(e > 50 for e in est) > 300
+
+
+def test_task_swapped_bounds():
+    t = Task(min=5, mode=3, max=1)
+    est = [t.estimate() for _ in range(1000)]
+    assert 1 <= min(est)
+    assert max(est) <= 5
+    est = t.estimate_batch(1000)
+    assert 1 <= est.min()
+    assert est.max() <= 5